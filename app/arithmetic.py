@@ -0,0 +1,181 @@
+import gmpy2
+import math
+import secrets
+from gmpy2 import mpz
+from typing import Iterable, List, NamedTuple, Sequence
+
+from phe import paillier
+
+# Below this many operands, splitting a request across worker processes
+# costs more than the products (or modexps) themselves
+PARALLEL_ADD_THRESHOLD = 1024
+PARALLEL_MULTIPLY_THRESHOLD = 64
+
+
+def encrypt(public_key: paillier.PaillierPublicKey, plaintext: int, blinding_factor: mpz) -> mpz:
+    """Raw Paillier encryption: (1 + m*n) * r^n mod n^2"""
+    nude = 1 + gmpy2.mul(mpz(plaintext), public_key.n)
+    return gmpy2.f_mod(gmpy2.mul(nude, blinding_factor), public_key.nsquare)
+
+
+def blinding_factor(n: int, nsquare: int) -> mpz:
+    """Compute r^n mod n^2 for a fresh random r coprime to n"""
+    while True:
+        r = secrets.randbelow(n)
+        if r > 1 and math.gcd(r, n) == 1:
+            return gmpy2.powmod(r, n, nsquare)
+
+
+def _product(nsquare: mpz, ciphertexts: List[mpz]) -> mpz:
+    """Multiply ciphertexts mod n^2 as a pairwise tree, one level at a time"""
+    if not ciphertexts:
+        return mpz(1)
+    # Reducing after every product keeps both operands at |n^2| bits, which
+    # is the size GMP's multiply and division are fastest at. Deferring the
+    # reduction or doing a Python-level Montgomery reduction is slower.
+    #
+    # The mpz operators dispatch straight to GMP, which is cheaper than going
+    # through the gmpy2.mul / gmpy2.f_mod function calls.
+    level = ciphertexts
+    while len(level) > 1:
+        paired = [a * b % nsquare for a, b in zip(level[::2], level[1::2])]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def add(public_key: paillier.PaillierPublicKey, ciphertexts: Iterable[mpz]) -> mpz:
+    """Homomorphic addition: the product of the ciphertexts mod n^2"""
+    return _product(mpz(public_key.nsquare), list(ciphertexts))
+
+
+def multiply(public_key: paillier.PaillierPublicKey, ciphertext: mpz, scalar: int) -> mpz:
+    """Homomorphic scalar multiplication: c^k mod n^2 for an encoded scalar k"""
+    n, nsquare = public_key.n, public_key.nsquare
+    if scalar >= n - public_key.max_int:
+        # Negative scalars are encoded as n - |k|; exponentiating the inverse
+        # by |k| avoids a full-width exponent
+        ciphertext = gmpy2.invert(ciphertext, nsquare)
+        scalar = n - scalar
+    return gmpy2.powmod(ciphertext, scalar, nsquare)
+
+
+def multiply_many(public_key: paillier.PaillierPublicKey,
+                  ciphertexts: Sequence[mpz], scalars: Sequence[int]) -> List[mpz]:
+    """
+    Element-wise homomorphic scalar multiplication, with each product
+    re-randomized by a fresh r^n
+    """
+    n, nsquare = public_key.n, public_key.nsquare
+    return [
+        rerandomize(public_key, multiply(public_key, ciphertext, scalar), blinding_factor(n, nsquare))
+        for ciphertext, scalar in zip(ciphertexts, scalars)
+    ]
+
+
+def multi_exp(nsquare: mpz, bases: Sequence[mpz], exponents: Sequence[int]) -> mpz:
+    """
+    Compute prod(b_i^e_i) mod n^2 with Pippenger's bucket method.
+    Each window of exponent bits costs one shared set of squarings plus
+    one multiply per base, instead of a full square-and-multiply per base.
+    """
+    if len(bases) == 1:
+        return gmpy2.powmod(bases[0], exponents[0], nsquare)
+
+    bits = max(exponent.bit_length() for exponent in exponents)
+    if bits == 0:
+        return mpz(1)
+    # About log2(k) - 2 bits per window balances bucket filling (k multiplies)
+    # against bucket combining (2^(window+1) multiplies)
+    window = max(1, min(len(bases).bit_length() - 2, 16, bits))
+    mask = (1 << window) - 1
+
+    result = mpz(1)
+    for shift in range(((bits - 1) // window) * window, -1, -window):
+        if result != 1:
+            for _ in range(window):
+                result = result * result % nsquare
+
+        buckets = [mpz(1)] * (mask + 1)
+        for base, exponent in zip(bases, exponents):
+            digit = (exponent >> shift) & mask
+            if digit:
+                buckets[digit] = buckets[digit] * base % nsquare
+
+        # prod(bucket_d^d) as a running product from the top bucket down
+        running = total = mpz(1)
+        for digit in range(mask, 0, -1):
+            if buckets[digit] != 1:
+                running = running * buckets[digit] % nsquare
+            if running != 1:
+                total = total * running % nsquare
+        result = result * total % nsquare
+    return result
+
+
+def linear_combination(public_key: paillier.PaillierPublicKey,
+                       ciphertexts: Sequence[mpz], scalars: Sequence[int]) -> mpz:
+    """Homomorphic weighted sum: prod(c_i^k_i) mod n^2 for signed integer scalars k_i"""
+    nsquare = mpz(public_key.nsquare)
+    bases, exponents = [], []
+    for ciphertext, scalar in zip(ciphertexts, scalars):
+        if scalar < 0:
+            # c^-k is the inverse raised to k, which keeps the exponent small
+            ciphertext = gmpy2.invert(ciphertext, nsquare)
+            scalar = -scalar
+        bases.append(ciphertext)
+        exponents.append(scalar)
+    return multi_exp(nsquare, bases, exponents)
+
+
+def rescale(public_key: paillier.PaillierPublicKey, ciphertext: mpz,
+            exponent: int, new_exponent: int) -> mpz:
+    """Lower a ciphertext's exponent by multiplying the plaintext by BASE^diff"""
+    if new_exponent == exponent:
+        return ciphertext
+    factor = paillier.EncodedNumber.BASE ** (exponent - new_exponent)
+    return gmpy2.powmod(ciphertext, factor, public_key.nsquare)
+
+
+def rerandomize(public_key: paillier.PaillierPublicKey, ciphertext: mpz, blinding_factor: mpz) -> mpz:
+    """Multiply in a fresh r^n so the result is unlinkable to its inputs"""
+    return gmpy2.f_mod(gmpy2.mul(ciphertext, blinding_factor), public_key.nsquare)
+
+
+class CrtParams(NamedTuple):
+    """Private key values used by CRT decryption, as mpz"""
+    p: mpz
+    q: mpz
+    psquare: mpz
+    qsquare: mpz
+    hp: mpz
+    hq: mpz
+    p_inverse: mpz
+
+
+def crt_params(private_key: paillier.PaillierPrivateKey) -> CrtParams:
+    """Get the key's CRT values, converting and caching them on first use"""
+    params = getattr(private_key, '_crt_params', None)
+    if params is None:
+        # phe's private key already computes p^2, q^2, hp, hq and p^-1 mod q
+        params = CrtParams(*(mpz(value) for value in (
+            private_key.p, private_key.q,
+            private_key.psquare, private_key.qsquare,
+            private_key.hp, private_key.hq,
+            private_key.p_inverse
+        )))
+        private_key._crt_params = params
+    return params
+
+
+def decrypt(private_key: paillier.PaillierPrivateKey, ciphertext: mpz) -> int:
+    """
+    Raw CRT decryption: two half-width modexps mod p^2 and q^2
+    recombined into the plaintext mod n.
+    """
+    p, q, psquare, qsquare, hp, hq, p_inverse = crt_params(private_key)
+    mp = gmpy2.f_mod(gmpy2.mul((gmpy2.powmod(ciphertext, p - 1, psquare) - 1) // p, hp), p)
+    mq = gmpy2.f_mod(gmpy2.mul((gmpy2.powmod(ciphertext, q - 1, qsquare) - 1) // q, hq), q)
+    u = gmpy2.f_mod(gmpy2.mul(mq - mp, p_inverse), q)
+    return int(mp + p * u)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
+from typing import List, Optional
+
+import gmpy2
+from phe import paillier
+
+from app import arithmetic
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds so a server that sees many keys cannot grow without limit
+MAX_POOLS = 64
+POOL_SIZE = 256
+REFILL_BATCH = 16
+
+
+def _compute_factors(n: int, nsquare: int, count: int) -> List[gmpy2.mpz]:
+    """Compute a batch of blinding factors (runs in a worker process)"""
+    return [arithmetic.blinding_factor(n, nsquare) for _ in range(count)]
+
+
+class BlindingPool:
+    """
+    Precomputed r^n mod n^2 values for a single public key.
+    Encryption pops one per ciphertext, so the modexp happens
+    in the background instead of on the request path.
+    """
+
+    def __init__(self, n: int, nsquare: int, size: int = POOL_SIZE):
+        self.n = n
+        self.nsquare = gmpy2.mpz(nsquare)
+        self._factors = deque(maxlen=size)
+
+    def missing(self) -> int:
+        """Number of factors needed to fill the pool"""
+        return self._factors.maxlen - len(self._factors)
+
+    def extend(self, factors: List[gmpy2.mpz]):
+        """Add freshly computed factors to the pool"""
+        self._factors.extend(factors[:self.missing()])
+
+    def take(self) -> gmpy2.mpz:
+        """Pop a precomputed factor, computing one inline if the pool is empty"""
+        try:
+            factor = self._factors.popleft()
+        except IndexError:
+            return arithmetic.blinding_factor(self.n, self.nsquare)
+        _wake_refill()
+        return factor
+
+    def take_available(self, count: int) -> List[gmpy2.mpz]:
+        """Pop up to count precomputed factors, without computing any"""
+        factors = [self._factors.popleft() for _ in range(min(count, len(self._factors)))]
+        if factors:
+            _wake_refill()
+        return factors
+
+
+_pools: "OrderedDict[int, BlindingPool]" = OrderedDict()
+
+# Set while refill_pools is running, so pools can wake it when they need topping up
+_refill_loop: Optional[asyncio.AbstractEventLoop] = None
+_refill_needed: Optional[asyncio.Event] = None
+
+
+def _wake_refill():
+    """Wake refill_pools, from its own event loop or any other thread"""
+    loop, needed = _refill_loop, _refill_needed
+    if loop is not None:
+        loop.call_soon_threadsafe(needed.set)
+
+
+def reset():
+    """
+    Forget every pool and any running refill task, for a worker process
+    that was forked from the server
+    """
+    global _refill_loop, _refill_needed
+    _pools.clear()
+    _refill_loop = _refill_needed = None
+
+
+def register(public_key: paillier.PaillierPublicKey, size: int = POOL_SIZE) -> BlindingPool:
+    """Start precomputing blinding factors for a public key"""
+    pool = _pools.get(public_key.n)
+    if pool is None:
+        pool = BlindingPool(public_key.n, public_key.nsquare, size)
+        _pools[public_key.n] = pool
+        # Evict the least recently registered key once we hit the bound
+        if len(_pools) > MAX_POOLS:
+            _pools.popitem(last=False)
+        _wake_refill()
+    return pool
+
+
+def unregister(public_key: paillier.PaillierPublicKey):
+    """Stop precomputing blinding factors for a public key"""
+    _pools.pop(public_key.n, None)
+
+
+def take(public_key: paillier.PaillierPublicKey) -> gmpy2.mpz:
+    """Get an r^n blinding factor for a public key"""
+    pool = _pools.get(public_key.n)
+    if pool is None:
+        return arithmetic.blinding_factor(public_key.n, public_key.nsquare)
+    return pool.take()
+
+
+def take_available(public_key: paillier.PaillierPublicKey, count: int) -> List[gmpy2.mpz]:
+    """Get up to count precomputed blinding factors for a public key"""
+    pool = _pools.get(public_key.n)
+    if pool is None:
+        return []
+    return pool.take_available(count)
+
+
+async def refill_pools(executor: Executor):
+    """
+    Keep every registered pool topped up, computing factors in the executor.
+    Sleeps until a key is registered or a factor is taken.
+    """
+    global _refill_loop, _refill_needed
+    loop = asyncio.get_running_loop()
+    _refill_loop, _refill_needed = loop, asyncio.Event()
+    try:
+        while True:
+            pending = [pool for pool in list(_pools.values()) if pool.missing()]
+            if not pending:
+                _refill_needed.clear()
+                await _refill_needed.wait()
+                continue
+
+            batches = await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor, _compute_factors,
+                    pool.n, pool.nsquare, min(REFILL_BATCH, pool.missing())
+                )
+                for pool in pending
+            ))
+            for pool, factors in zip(pending, batches):
+                pool.extend(factors)
+    finally:
+        _refill_loop = _refill_needed = None
+
+
+def _log_failure(task: asyncio.Task):
+    """Report a refill task that stopped on an error rather than a cancel"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Blinding factor refill stopped", exc_info=task.exception())
+
+
+def start(executor: Executor) -> asyncio.Task:
+    """Start refilling the blinding pools in the background"""
+    task = asyncio.create_task(refill_pools(executor))
+    task.add_done_callback(_log_failure)
+    return task
@@ -1,6 +1,67 @@
 from phe import paillier
-import json
-from typing import List, Tuple
+import base64
+import functools
+import gmpy2
+import orjson
+from typing import List, Optional, Sequence, Tuple
+
+from app import arithmetic, blinding
+from app.models import EncryptedNumber
+
+# Intel Paillier Cryptosystem Library (optional, built from source). Its
+# multi-buffer modexp packs 8 encryptions into AVX-512 IFMA lanes, so it only
+# pays off on CPUs that expose that instruction set.
+try:
+    import numpy as np
+    import ipcl_python as ipcl
+except ImportError:
+    ipcl = None
+
+
+def _cpu_has_avx512ifma() -> bool:
+    """Check whether the CPU advertises the AVX-512 IFMA extension"""
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            return 'avx512ifma' in cpuinfo.read()
+    except OSError:
+        return False
+
+
+USE_IPCL = ipcl is not None and _cpu_has_avx512ifma()
+
+
+def _int_to_b64(value: int) -> str:
+    """Encode a non-negative integer as base64 big-endian bytes"""
+    value = int(value)
+    return base64.b64encode(value.to_bytes((value.bit_length() + 7) // 8, 'big')).decode()
+
+
+def _b64_to_mpz(encoded: str) -> gmpy2.mpz:
+    """Decode base64 big-endian bytes back into an integer"""
+    return gmpy2.mpz(int.from_bytes(base64.b64decode(encoded), 'big'))
+
+
+# A ciphertext together with the base-16 exponent of its fixed-point encoding
+EncryptedValue = Tuple[gmpy2.mpz, int]
+
+
+@functools.lru_cache(maxsize=64)
+def _ipcl_public_key(n: int) -> "ipcl.PaillierPublicKey":
+    """IPCL's copy of a public key, built once per modulus"""
+    return ipcl.PaillierPublicKey(n, enable_DJN=False)
+
+
+def _ipcl_encrypt(public_key: paillier.PaillierPublicKey, numbers: List[float]) -> List[EncryptedValue]:
+    """
+    Encrypt with IPCL's multi-buffer modexp. IPCL draws its own r, and
+    encodes with the same base-16 fixed-point exponents as phe.
+    """
+    encrypted = _ipcl_public_key(public_key.n).encrypt(np.asarray(numbers, dtype=np.float64))
+    return [
+        (gmpy2.mpz(int(encrypted.ciphertext(i))), int(encrypted.exponent(i)))
+        for i in range(len(numbers))
+    ]
+
 
 class HomomorphicEncryption:
     """
@@ -11,108 +72,292 @@ class HomomorphicEncryption:
     @staticmethod
     def generate_keypair() -> Tuple[paillier.PaillierPublicKey, paillier.PaillierPrivateKey]:
         """Generate a new public/private keypair"""
-        public_key, private_key = paillier.generate_paillier_keypair(n_length=512)
+        public_key, private_key = paillier.generate_paillier_keypair(n_length=2048)
+        arithmetic.crt_params(private_key)
         return public_key, private_key
     
     @staticmethod
     def serialize_public_key(public_key: paillier.PaillierPublicKey) -> str:
         """Convert public key to JSON string for transmission"""
-        return json.dumps({'n': public_key.n})
+        return orjson.dumps({'n': _int_to_b64(public_key.n)}).decode()
     
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def deserialize_public_key(key_str: str) -> paillier.PaillierPublicKey:
-        """Recreate public key from JSON string"""
-        key_data = json.loads(key_str)
-        return paillier.PaillierPublicKey(n=int(key_data['n']))
+        """
+        Recreate public key from JSON string.
+        Cached, since clients typically encrypt once and compute many times
+        with the same key.
+        """
+        key_data = orjson.loads(key_str)
+        return paillier.PaillierPublicKey(n=int(_b64_to_mpz(key_data['n'])))
     
     @staticmethod
     def serialize_private_key(private_key: paillier.PaillierPrivateKey) -> str:
         """Convert private key to JSON string (in practice, keep this secure!)"""
-        return json.dumps({
-            'p': private_key.p,
-            'q': private_key.q
-        })
+        return orjson.dumps({
+            'p': _int_to_b64(private_key.p),
+            'q': _int_to_b64(private_key.q)
+        }).decode()
+    
+    @staticmethod
+    def public_key_from_private_key(key_str: str) -> paillier.PaillierPublicKey:
+        """Reconstruct the public key (n = p * q) from a private key JSON string"""
+        key_data = orjson.loads(key_str)
+        return paillier.PaillierPublicKey(
+            n=int(_b64_to_mpz(key_data['p']) * _b64_to_mpz(key_data['q']))
+        )
     
     @staticmethod
+    @functools.lru_cache(maxsize=64)
     def deserialize_private_key(key_str: str, public_key: paillier.PaillierPublicKey) -> paillier.PaillierPrivateKey:
-        """Recreate private key from JSON string"""
-        key_data = json.loads(key_str)
-        return paillier.PaillierPrivateKey(
+        """
+        Recreate private key from JSON string.
+        Cached, so a key used for repeated decrypts computes hp, hq and
+        the CRT parameters only once.
+        """
+        key_data = orjson.loads(key_str)
+        private_key = paillier.PaillierPrivateKey(
             public_key=public_key,
-            p=int(key_data['p']),
-            q=int(key_data['q'])
+            p=int(_b64_to_mpz(key_data['p'])),
+            q=int(_b64_to_mpz(key_data['q']))
         )
+        # Do the decryption setup once here rather than on the first decrypt
+        arithmetic.crt_params(private_key)
+        return private_key
+    
+    # In-process layer: ciphertexts stay as (mpz ciphertext, exponent) pairs
+    # so chained operations never round-trip through JSON
+    
+    @staticmethod
+    def encrypt_mpz(public_key: paillier.PaillierPublicKey, number: float,
+                    blinding_factor: Optional[gmpy2.mpz] = None) -> EncryptedValue:
+        """
+        Encrypt a single number using the public key.
+        With g = n + 1, g^m mod n^2 collapses to 1 + m*n, so the only
+        modexp left is the r^n blinding factor, which is taken from the
+        key's precomputed pool when one is registered.
+        """
+        if blinding_factor is None:
+            blinding_factor = blinding.take(public_key)
+        encoded = paillier.EncodedNumber.encode(public_key, number)
+        ciphertext = arithmetic.encrypt(public_key, encoded.encoding, blinding_factor)
+        return ciphertext, encoded.exponent
+    
+    @staticmethod
+    def encrypt_batch_mpz(public_key: paillier.PaillierPublicKey, numbers: List[float],
+                          blinding_factors: Optional[Sequence[gmpy2.mpz]] = None) -> List[EncryptedValue]:
+        """
+        Encrypt a list of numbers in one go.
+        Numbers that get a precomputed blinding factor (passed in, or taken
+        from the key's pool in this process) only cost a mulmod. The rest
+        go through IPCL's multi-buffer modular exponentiation when
+        available, otherwise each is encrypted on its own.
+        """
+        if blinding_factors is None:
+            blinding_factors = blinding.take_available(public_key, len(numbers))
+        encrypted = [
+            HomomorphicEncryption.encrypt_mpz(public_key, num, factor)
+            for num, factor in zip(numbers, blinding_factors)
+        ]
+        remaining = numbers[len(encrypted):]
+        if not remaining:
+            return encrypted
+        
+        if not USE_IPCL:
+            return encrypted + [
+                HomomorphicEncryption.encrypt_mpz(public_key, num)
+                for num in remaining
+            ]
+        return encrypted + _ipcl_encrypt(public_key, remaining)
     
     @staticmethod
-    def encrypt_number(public_key: paillier.PaillierPublicKey, number: float) -> str:
+    def decrypt_mpz(private_key: paillier.PaillierPrivateKey, encrypted: EncryptedValue) -> float:
+        """
+        Decrypt an encrypted number using the private key.
+        Uses CRT decryption: two half-width modexps mod p^2 and q^2
+        instead of one full-width modexp mod n^2.
+        """
+        ciphertext, exponent = encrypted
+        plaintext = arithmetic.decrypt(private_key, ciphertext)
+        return paillier.EncodedNumber(private_key.public_key, plaintext, exponent).decode()
+    
+    @staticmethod
+    def add_mpz(public_key: paillier.PaillierPublicKey, encrypted: List[EncryptedValue],
+                rerandomize: bool = True) -> EncryptedValue:
+        """
+        Add encrypted numbers without decrypting them.
+        Partial sums that are added together again later can skip
+        the re-randomization.
+        """
+        # Bring every operand down to the smallest exponent before adding
+        exponent = min(exp for _, exp in encrypted)
+        ciphertexts = [
+            arithmetic.rescale(public_key, ciphertext, exp, exponent)
+            for ciphertext, exp in encrypted
+        ]
+        
+        result = arithmetic.add(public_key, ciphertexts)
+        if rerandomize:
+            result = arithmetic.rerandomize(public_key, result, blinding.take(public_key))
+        return result, exponent
+    
+    @staticmethod
+    def multiply_mpz(public_key: paillier.PaillierPublicKey,
+                     encrypted: EncryptedValue, scalar: float) -> EncryptedValue:
+        """Multiply an encrypted number by a plaintext scalar"""
+        ciphertext, exponent = encrypted
+        encoded = paillier.EncodedNumber.encode(public_key, scalar)
+        
+        result = arithmetic.multiply(public_key, ciphertext, encoded.encoding)
+        result = arithmetic.rerandomize(public_key, result, blinding.take(public_key))
+        return result, exponent + encoded.exponent
+    
+    @staticmethod
+    def multiply_batch_mpz(public_key: paillier.PaillierPublicKey, encrypted: List[EncryptedValue],
+                           scalars: List[float]) -> List[EncryptedValue]:
+        """Multiply each encrypted number by its own plaintext scalar"""
+        encoded = [paillier.EncodedNumber.encode(public_key, scalar) for scalar in scalars]
+        products = arithmetic.multiply_many(
+            public_key,
+            [ciphertext for ciphertext, _ in encrypted],
+            [enc.encoding for enc in encoded]
+        )
+        return [
+            (product, exponent + enc.exponent)
+            for product, (_, exponent), enc in zip(products, encrypted, encoded)
+        ]
+    
+    @staticmethod
+    def linear_combination_mpz(public_key: paillier.PaillierPublicKey, encrypted: List[EncryptedValue],
+                               weights: List[float]) -> EncryptedValue:
+        """
+        Compute the weighted sum of encrypted numbers, sum(w_i * x_i), in one
+        multi-exponentiation. Covers both addition (all weights 1) and
+        scalar multiplication (a single term).
+        """
+        encoded = [paillier.EncodedNumber.encode(public_key, weight) for weight in weights]
+        n = public_key.n
+        
+        # Each term's exponent is its ciphertext's plus its weight's. Rather
+        # than rescaling ciphertexts to a common exponent with extra modexps,
+        # fold the BASE^diff factor into the (signed) weight itself.
+        exponents = [exp + enc.exponent for (_, exp), enc in zip(encrypted, encoded)]
+        exponent = min(exponents)
+        scalars = [
+            (enc.encoding - n if enc.encoding >= n - public_key.max_int else enc.encoding)
+            * paillier.EncodedNumber.BASE ** (term_exponent - exponent)
+            for enc, term_exponent in zip(encoded, exponents)
+        ]
+        
+        result = arithmetic.linear_combination(
+            public_key,
+            [ciphertext for ciphertext, _ in encrypted],
+            scalars
+        )
+        result = arithmetic.rerandomize(public_key, result, blinding.take(public_key))
+        return result, exponent
+    
+    # Serialization facade used at the HTTP boundary
+    
+    @staticmethod
+    def serialize_encrypted(encrypted: EncryptedValue) -> EncryptedNumber:
+        """Convert a ciphertext and its exponent to the wire model"""
+        ciphertext, exponent = encrypted
+        return EncryptedNumber(ciphertext=_int_to_b64(ciphertext), exponent=exponent)
+    
+    @staticmethod
+    def deserialize_encrypted(encrypted: EncryptedNumber) -> EncryptedValue:
+        """Recreate a ciphertext and its exponent from the wire model"""
+        return _b64_to_mpz(encrypted.ciphertext), encrypted.exponent
+    
+    @staticmethod
+    def encrypt_number(public_key: paillier.PaillierPublicKey, number: float) -> EncryptedNumber:
         """Encrypt a single number using the public key"""
-        encrypted = public_key.encrypt(number)
-        # Serialize to string for transmission
-        return json.dumps({
-            'ciphertext': str(encrypted.ciphertext()),
-            'exponent': encrypted.exponent
-        })
+        return HomomorphicEncryption.serialize_encrypted(
+            HomomorphicEncryption.encrypt_mpz(public_key, number)
+        )
     
     @staticmethod
-    def decrypt_number(private_key: paillier.PaillierPrivateKey, encrypted_str: str) -> float:
+    def encrypt_numbers_batch(public_key: paillier.PaillierPublicKey, numbers: List[float],
+                              blinding_factors: Optional[Sequence[gmpy2.mpz]] = None) -> List[EncryptedNumber]:
+        """Encrypt a list of numbers in one go"""
+        return [
+            HomomorphicEncryption.serialize_encrypted(encrypted)
+            for encrypted in HomomorphicEncryption.encrypt_batch_mpz(public_key, numbers, blinding_factors)
+        ]
+    
+    @staticmethod
+    def decrypt_number(private_key: paillier.PaillierPrivateKey, encrypted: EncryptedNumber) -> float:
         """Decrypt an encrypted number using the private key"""
-        data = json.loads(encrypted_str)
-        # Reconstruct EncryptedNumber object
-        encrypted_num = paillier.EncryptedNumber(
-            public_key=private_key.public_key,
-            ciphertext=int(data['ciphertext']),
-            exponent=data['exponent']
+        return HomomorphicEncryption.decrypt_mpz(
+            private_key,
+            HomomorphicEncryption.deserialize_encrypted(encrypted)
         )
-        return private_key.decrypt(encrypted_num)
     
     @staticmethod
-    def add_encrypted_numbers(public_key: paillier.PaillierPublicKey, encrypted_nums: List[str]) -> str:
+    def decrypt_with_private_key(private_key_str: str, encrypted: EncryptedNumber) -> float:
+        """
+        Decrypt an encrypted number with a serialized private key.
+        Deserializing here keeps the key setup next to the decryption,
+        in whichever process runs it.
+        """
+        public_key = HomomorphicEncryption.public_key_from_private_key(private_key_str)
+        private_key = HomomorphicEncryption.deserialize_private_key(private_key_str, public_key)
+        return HomomorphicEncryption.decrypt_number(private_key, encrypted)
+    
+    @staticmethod
+    def add_encrypted_numbers(public_key: paillier.PaillierPublicKey, encrypted_nums: List[EncryptedNumber],
+                              rerandomize: bool = True) -> EncryptedNumber:
         """
         Add encrypted numbers without decrypting them.
         This demonstrates homomorphic addition.
         """
-        # Deserialize first number
-        data = json.loads(encrypted_nums[0])
-        result = paillier.EncryptedNumber(
-            public_key=public_key,
-            ciphertext=int(data['ciphertext']),
-            exponent=data['exponent']
+        result = HomomorphicEncryption.add_mpz(
+            public_key,
+            [HomomorphicEncryption.deserialize_encrypted(num) for num in encrypted_nums],
+            rerandomize
         )
-        
-        # Add remaining numbers
-        for encrypted_str in encrypted_nums[1:]:
-            data = json.loads(encrypted_str)
-            encrypted_num = paillier.EncryptedNumber(
-                public_key=public_key,
-                ciphertext=int(data['ciphertext']),
-                exponent=data['exponent']
-            )
-            result = result + encrypted_num
-        
-        # Serialize result
-        return json.dumps({
-            'ciphertext': str(result.ciphertext()),
-            'exponent': result.exponent
-        })
+        return HomomorphicEncryption.serialize_encrypted(result)
     
     @staticmethod
     def multiply_encrypted_by_scalar(public_key: paillier.PaillierPublicKey, 
-                                     encrypted_str: str, scalar: float) -> str:
+                                     encrypted: EncryptedNumber, scalar: float) -> EncryptedNumber:
         """
         Multiply an encrypted number by a plaintext scalar.
         This demonstrates homomorphic scalar multiplication.
         """
-        data = json.loads(encrypted_str)
-        encrypted_num = paillier.EncryptedNumber(
-            public_key=public_key,
-            ciphertext=int(data['ciphertext']),
-            exponent=data['exponent']
+        result = HomomorphicEncryption.multiply_mpz(
+            public_key,
+            HomomorphicEncryption.deserialize_encrypted(encrypted),
+            scalar
         )
-        
-        # Multiply by scalar
-        result = encrypted_num * scalar
-        
-        return json.dumps({
-            'ciphertext': str(result.ciphertext()),
-            'exponent': result.exponent
-        })
\ No newline at end of file
+        return HomomorphicEncryption.serialize_encrypted(result)
+    
+    @staticmethod
+    def multiply_batch(public_key: paillier.PaillierPublicKey, encrypted_nums: List[EncryptedNumber],
+                       scalars: List[float]) -> List[EncryptedNumber]:
+        """
+        Multiply a batch of encrypted numbers by plaintext scalars, element-wise.
+        This is the building block for encrypted dot products.
+        """
+        results = HomomorphicEncryption.multiply_batch_mpz(
+            public_key,
+            [HomomorphicEncryption.deserialize_encrypted(num) for num in encrypted_nums],
+            scalars
+        )
+        return [HomomorphicEncryption.serialize_encrypted(result) for result in results]
+    
+    @staticmethod
+    def linear_combination(public_key: paillier.PaillierPublicKey, encrypted_nums: List[EncryptedNumber],
+                           weights: List[float]) -> EncryptedNumber:
+        """
+        Compute a weighted sum of encrypted numbers without decrypting them.
+        This is the general primitive behind encrypted dot products.
+        """
+        result = HomomorphicEncryption.linear_combination_mpz(
+            public_key,
+            [HomomorphicEncryption.deserialize_encrypted(num) for num in encrypted_nums],
+            weights
+        )
+        return HomomorphicEncryption.serialize_encrypted(result)
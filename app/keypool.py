@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+
+from phe import paillier
+
+from app import blinding, workers
+from app.encryption import HomomorphicEncryption
+
+logger = logging.getLogger(__name__)
+
+# Keypairs kept ready so /encrypt never waits on prime generation
+POOL_SIZE = 16
+# Key generations kept in flight at once, about one per worker process
+FILL_CONCURRENCY = os.cpu_count() or 1
+# Blinding factors precomputed for each pooled key, about one request's worth
+BLINDING_FACTORS_PER_KEY = 32
+
+_ready: Optional["asyncio.Queue[Tuple[paillier.PaillierPublicKey, paillier.PaillierPrivateKey]]"] = None
+# Free places in the pool, counting keys still being generated
+_slots: Optional[asyncio.Semaphore] = None
+_fillers: List[asyncio.Task] = []
+
+
+async def _fill(executor: Executor):
+    """Keep the queue of ready keypairs full, generating keys in the executor"""
+    loop = asyncio.get_running_loop()
+    while True:
+        # Waits here while the pool is full
+        await _slots.acquire()
+        try:
+            public_key, private_key = await loop.run_in_executor(
+                executor, HomomorphicEncryption.generate_keypair
+            )
+        except BaseException:
+            _slots.release()
+            raise
+        blinding.register(public_key, size=BLINDING_FACTORS_PER_KEY)
+        _ready.put_nowait((public_key, private_key))
+
+
+def _log_failure(task: asyncio.Task):
+    """Report a filler that stopped on an error rather than a cancel"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Keypair pool filler stopped", exc_info=task.exception())
+
+
+def start(executor: Executor):
+    """Start generating keypairs in the background"""
+    global _ready, _slots, _fillers
+    _ready = asyncio.Queue()
+    _slots = asyncio.Semaphore(POOL_SIZE)
+    _fillers = [asyncio.create_task(_fill(executor)) for _ in range(FILL_CONCURRENCY)]
+    for filler in _fillers:
+        filler.add_done_callback(_log_failure)
+
+
+def stop():
+    """Stop generating keypairs"""
+    for filler in _fillers:
+        filler.cancel()
+
+
+async def _take_ready() -> Optional[Tuple[paillier.PaillierPublicKey, paillier.PaillierPrivateKey]]:
+    """Wait for a pooled keypair, or return None once no filler is left to make one"""
+    getter = asyncio.ensure_future(_ready.get())
+    try:
+        running = {filler for filler in _fillers if not filler.done()}
+        while running and not getter.done():
+            done, _ = await asyncio.wait({getter, *running}, return_when=asyncio.FIRST_COMPLETED)
+            running -= done
+        if getter.done():
+            return getter.result()
+        return None
+    finally:
+        getter.cancel()
+
+
+async def get_keypair() -> Tuple[paillier.PaillierPublicKey, paillier.PaillierPrivateKey]:
+    """
+    Take a ready keypair, or generate one if the pool isn't running or
+    its fillers have all stopped
+    """
+    if _ready is not None:
+        keypair = _ready.get_nowait() if not _ready.empty() else await _take_ready()
+        if keypair is not None:
+            _slots.release()
+            return keypair
+    return await workers.run(HomomorphicEncryption.generate_keypair)
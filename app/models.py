@@ -1,61 +1,101 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 
+class EncryptedNumber(BaseModel):
+    """A Paillier ciphertext with the exponent of its fixed-point encoding"""
+    ciphertext: str = Field(..., description="Ciphertext as base64-encoded big-endian bytes")
+    exponent: int = Field(..., description="Base-16 exponent of the encoded plaintext")
+
 class EncryptRequest(BaseModel):
     """Request model for encrypting numbers"""
     numbers: List[float] = Field(..., description="List of numbers to encrypt")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "numbers": [10, 20, 30]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "numbers": [10, 20, 30]
         }
+    })
 
 class EncryptResponse(BaseModel):
     """Response model containing encrypted values and keys"""
-    encrypted_numbers: List[str] = Field(..., description="Encrypted numbers as JSON strings")
+    encrypted_numbers: List[EncryptedNumber] = Field(..., description="Encrypted numbers")
     public_key: str = Field(..., description="Public key for operations")
     private_key: str = Field(..., description="Private key for decryption")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "encrypted_numbers": [
-                    "{\"ciphertext\": \"123...\", \"exponent\": 0}",
-                    "{\"ciphertext\": \"456...\", \"exponent\": 0}"
-                ],
-                "public_key": "{\"n\": 789...}",
-                "private_key": "{\"p\": 123..., \"q\": 456...}"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "encrypted_numbers": [
+                {"ciphertext": "q83v...", "exponent": -13},
+                {"ciphertext": "ASNF...", "exponent": -12}
+            ],
+            "public_key": "{\"n\":\"3q2+...\"}",
+            "private_key": "{\"p\":\"8J+Q...\",\"q\":\"z8/P...\"}"
         }
+    })
 
 class ComputeRequest(BaseModel):
     """Request model for computing on encrypted data"""
-    encrypted_numbers: List[str] = Field(..., description="Encrypted numbers (JSON format from /encrypt)")
+    encrypted_numbers: List[EncryptedNumber] = Field(..., description="Encrypted numbers (as returned by /encrypt)")
     public_key: str = Field(..., description="Public key used for encryption")
     operation: str = Field(..., description="Operation: 'add', 'sum', or 'multiply'")
     multiplier: Optional[float] = Field(None, description="Multiplier for multiply operation")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "encrypted_numbers": [
-                    "{\"ciphertext\": \"123...\", \"exponent\": 0}",
-                    "{\"ciphertext\": \"456...\", \"exponent\": 0}"
-                ],
-                "public_key": "{\"n\": 789...}",
-                "operation": "add"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "encrypted_numbers": [
+                {"ciphertext": "q83v...", "exponent": -13},
+                {"ciphertext": "ASNF...", "exponent": -12}
+            ],
+            "public_key": "{\"n\":\"3q2+...\"}",
+            "operation": "add"
         }
+    })
 
 class ComputeResponse(BaseModel):
     """Response model for computation result"""
-    encrypted_result: str = Field(..., description="Encrypted computation result (JSON format)")
+    encrypted_result: EncryptedNumber = Field(..., description="Encrypted computation result")
+
+class MultiplyBatchRequest(BaseModel):
+    """Request model for element-wise scalar multiplication of encrypted data"""
+    encrypted_numbers: List[EncryptedNumber] = Field(..., description="Encrypted numbers (as returned by /encrypt)")
+    public_key: str = Field(..., description="Public key used for encryption")
+    multipliers: List[float] = Field(..., description="One multiplier per encrypted number, or a single multiplier for all")
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "encrypted_numbers": [
+                {"ciphertext": "q83v...", "exponent": -13},
+                {"ciphertext": "ASNF...", "exponent": -12}
+            ],
+            "public_key": "{\"n\":\"3q2+...\"}",
+            "multipliers": [0.5, 2]
+        }
+    })
+
+class MultiplyBatchResponse(BaseModel):
+    """Response model for element-wise scalar multiplication"""
+    encrypted_results: List[EncryptedNumber] = Field(..., description="Encrypted products, in input order")
+
+class LinearCombinationRequest(BaseModel):
+    """Request model for computing a weighted sum of encrypted data"""
+    encrypted_numbers: List[EncryptedNumber] = Field(..., description="Encrypted numbers (as returned by /encrypt)")
+    public_key: str = Field(..., description="Public key used for encryption")
+    weights: List[float] = Field(..., description="One plaintext weight per encrypted number")
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "encrypted_numbers": [
+                {"ciphertext": "q83v...", "exponent": -13},
+                {"ciphertext": "ASNF...", "exponent": -12}
+            ],
+            "public_key": "{\"n\":\"3q2+...\"}",
+            "weights": [0.25, -1.5]
+        }
+    })
 
 class DecryptRequest(BaseModel):
     """Request model for decrypting values"""
-    encrypted_value: str = Field(..., description="Encrypted value (JSON format)")
+    encrypted_value: EncryptedNumber = Field(..., description="Encrypted value")
     private_key: str = Field(..., description="Private key for decryption")
 
 class DecryptResponse(BaseModel):
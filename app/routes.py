@@ -1,37 +1,92 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from typing import Any, Callable, Dict, Type, TypeVar
 from app.models import (
     EncryptRequest, EncryptResponse,
     ComputeRequest, ComputeResponse,
+    MultiplyBatchRequest, MultiplyBatchResponse,
+    LinearCombinationRequest,
     DecryptRequest, DecryptResponse
 )
+from app import arithmetic, blinding, keypool, workers
 from app.encryption import HomomorphicEncryption
 
 router = APIRouter()
 
-temp_keypair_storage = {}
+M = TypeVar('M', bound=BaseModel)
+
+def _body_error(error: Dict[str, Any]) -> Dict[str, Any]:
+    """Report a body validation error the way FastAPI does for regular bodies"""
+    error = {**error, "loc": ("body", *error["loc"])}
+    if error["type"] == "json_invalid" or isinstance(error.get("input"), bytes):
+        # Unparseable bodies come back as the raw bytes, which may not be
+        # UTF-8 and may hold a private key, so never echo them
+        error["input"] = {}
+    return error
 
-@router.post("/encrypt", response_model=EncryptResponse, tags=["Encryption"])
-async def encrypt_numbers(request: EncryptRequest):
+def json_body(model: Type[M]) -> Callable:
+    """
+    Dependency that validates the raw request body with pydantic-core's
+    JSON parser in a single pass, instead of FastAPI's decode-then-validate.
+    """
+    async def parse(request: Request) -> M:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([_body_error(error) for error in e.errors()])
+    return parse
+
+# Schemas of models nested in json_body request bodies, for
+# add_request_schemas to publish as OpenAPI components
+request_schemas: Dict[str, Any] = {}
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI request body for a route that parses its body with json_body"""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    request_schemas.update(schema.pop("$defs", {}))
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}}
+        }
+    }
+
+def add_request_schemas(openapi_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the nested request body schemas to an OpenAPI document's components"""
+    components = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+    for name, schema in request_schemas.items():
+        components.setdefault(name, schema)
+    return openapi_schema
+
+@router.post("/encrypt", response_model=EncryptResponse, tags=["Encryption"],
+             openapi_extra=json_body_openapi(EncryptRequest))
+async def encrypt_numbers(request: EncryptRequest = Depends(json_body(EncryptRequest))):
     """
     Encrypt a list of numbers using Paillier homomorphic encryption.
     Returns encrypted values, public key, and private key (for testing).
     """
     try:
-        # Generate new keypair
-        public_key, private_key = HomomorphicEncryption.generate_keypair()
+        # Take a pre-generated keypair
+        public_key, private_key = await keypool.get_keypair()
         
-        # Encrypt each number
-        encrypted_numbers = [
-            HomomorphicEncryption.encrypt_number(public_key, num)
-            for num in request.numbers
-        ]
+        # Encrypt all numbers in one batch, handing the worker the key's
+        # precomputed blinding factors
+        factors = blinding.take_available(public_key, len(request.numbers))
+        blinding.unregister(public_key)
+        encrypted_numbers = await workers.run(
+            HomomorphicEncryption.encrypt_numbers_batch,
+            public_key,
+            request.numbers,
+            factors
+        )
         
         # Serialize keys
         public_key_str = HomomorphicEncryption.serialize_public_key(public_key)
         private_key_str = HomomorphicEncryption.serialize_private_key(private_key)
         
-        temp_keypair_storage[public_key_str] = private_key_str
-        
         return EncryptResponse(
             encrypted_numbers=encrypted_numbers,
             public_key=public_key_str,
@@ -39,8 +94,9 @@ async def encrypt_numbers(request: EncryptRequest):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Encryption failed: {str(e)}")
-@router.post("/compute", response_model=ComputeResponse, tags=["Homomorphic Operations"])
-async def compute_on_encrypted(request: ComputeRequest):
+@router.post("/compute", response_model=ComputeResponse, tags=["Homomorphic Operations"],
+             openapi_extra=json_body_openapi(ComputeRequest))
+async def compute_on_encrypted(request: ComputeRequest = Depends(json_body(ComputeRequest))):
     """
     Perform computations on encrypted data without decrypting.
     Supports 'add' (addition) and 'multiply' (scalar multiplication).
@@ -52,10 +108,24 @@ async def compute_on_encrypted(request: ComputeRequest):
         operation = request.operation.lower()
         
         if operation in ["add", "sum"]:
-            # Add all encrypted numbers together
-            result = HomomorphicEncryption.add_encrypted_numbers(
+            # Add all encrypted numbers together, summing large batches
+            # as one partial sum per worker first
+            encrypted_numbers = request.encrypted_numbers
+            chunks = workers.split(len(encrypted_numbers), arithmetic.PARALLEL_ADD_THRESHOLD)
+            if len(chunks) > 1:
+                encrypted_numbers = await asyncio.gather(*(
+                    workers.run(
+                        HomomorphicEncryption.add_encrypted_numbers,
+                        public_key,
+                        encrypted_numbers[chunk],
+                        False
+                    )
+                    for chunk in chunks
+                ))
+            result = await workers.run(
+                HomomorphicEncryption.add_encrypted_numbers,
                 public_key, 
-                request.encrypted_numbers
+                encrypted_numbers
             )
         elif operation == "multiply":
             if request.multiplier is None:
@@ -63,7 +133,8 @@ async def compute_on_encrypted(request: ComputeRequest):
                     status_code=400, 
                     detail="Multiplier required for multiply operation"
                 )
-            result = HomomorphicEncryption.multiply_encrypted_by_scalar(
+            result = await workers.run(
+                HomomorphicEncryption.multiply_encrypted_by_scalar,
                 public_key,
                 request.encrypted_numbers[0],
                 request.multiplier
@@ -80,30 +151,85 @@ async def compute_on_encrypted(request: ComputeRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Computation failed: {str(e)}")
 
-@router.post("/decrypt", response_model=DecryptResponse, tags=["Decryption"])
-async def decrypt_value(request: DecryptRequest):
+@router.post("/compute/multiply-batch", response_model=MultiplyBatchResponse, tags=["Homomorphic Operations"],
+             openapi_extra=json_body_openapi(MultiplyBatchRequest))
+async def multiply_batch(request: MultiplyBatchRequest = Depends(json_body(MultiplyBatchRequest))):
     """
-    Decrypt an encrypted value using the private key.
+    Multiply many encrypted numbers by plaintext scalars in one call.
+    A single multiplier is applied to every encrypted number.
     """
     try:
-        private_key_str = request.private_key
+        public_key = HomomorphicEncryption.deserialize_public_key(request.public_key)
         
-        import json
-        priv_data = json.loads(private_key_str)
+        multipliers = request.multipliers
+        if len(multipliers) == 1:
+            multipliers = multipliers * len(request.encrypted_numbers)
+        if len(multipliers) != len(request.encrypted_numbers):
+            raise HTTPException(
+                status_code=400,
+                detail="Provide one multiplier per encrypted number, or a single multiplier"
+            )
         
-        # Reconstruct public key (n = p * q)
-        n = priv_data['p'] * priv_data['q']
-        public_key_str = json.dumps({'n': n})
+        chunks = workers.split(len(multipliers), arithmetic.PARALLEL_MULTIPLY_THRESHOLD)
+        results = await asyncio.gather(*(
+            workers.run(
+                HomomorphicEncryption.multiply_batch,
+                public_key,
+                request.encrypted_numbers[chunk],
+                multipliers[chunk]
+            )
+            for chunk in chunks
+        ))
         
-        public_key = HomomorphicEncryption.deserialize_public_key(public_key_str)
-        private_key = HomomorphicEncryption.deserialize_private_key(
-            private_key_str, 
-            public_key
+        return MultiplyBatchResponse(encrypted_results=[
+            result for chunk_results in results for result in chunk_results
+        ])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Computation failed: {str(e)}")
+
+@router.post("/compute/linear-combination", response_model=ComputeResponse, tags=["Homomorphic Operations"],
+             openapi_extra=json_body_openapi(LinearCombinationRequest))
+async def linear_combination(request: LinearCombinationRequest = Depends(json_body(LinearCombinationRequest))):
+    """
+    Compute a weighted sum of encrypted numbers, e.g. an encrypted dot
+    product, in a single multi-exponentiation.
+    """
+    try:
+        public_key = HomomorphicEncryption.deserialize_public_key(request.public_key)
+        
+        if not request.encrypted_numbers or len(request.weights) != len(request.encrypted_numbers):
+            raise HTTPException(
+                status_code=400,
+                detail="Provide one weight per encrypted number"
+            )
+        
+        result = await workers.run(
+            HomomorphicEncryption.linear_combination,
+            public_key,
+            request.encrypted_numbers,
+            request.weights
         )
         
-        # Decrypt the value
-        decrypted = HomomorphicEncryption.decrypt_number(
-            private_key, 
+        return ComputeResponse(encrypted_result=result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Computation failed: {str(e)}")
+
+@router.post("/decrypt", response_model=DecryptResponse, tags=["Decryption"],
+             openapi_extra=json_body_openapi(DecryptRequest))
+async def decrypt_value(request: DecryptRequest = Depends(json_body(DecryptRequest))):
+    """
+    Decrypt an encrypted value using the private key.
+    """
+    try:
+        # Rebuild the key and decrypt in one worker call, so a cache miss
+        # on the key's CRT setup doesn't run here either
+        decrypted = await workers.run(
+            HomomorphicEncryption.decrypt_with_private_key,
+            request.private_key, 
             request.encrypted_value
         )
         
@@ -120,20 +246,28 @@ async def demo_full_workflow():
     3. Decrypt the result (should be 60)
     """
     try:
-        public_key, private_key = HomomorphicEncryption.generate_keypair()
+        public_key, private_key = await keypool.get_keypair()
         numbers = [10, 20, 30]
         
-        encrypted = [
-            HomomorphicEncryption.encrypt_number(public_key, num)
-            for num in numbers
-        ]
+        factors = blinding.take_available(public_key, len(numbers))
+        blinding.unregister(public_key)
+        
+        # No HTTP boundary between these steps, so skip the JSON round-trips
+        encrypted = await workers.run(
+            HomomorphicEncryption.encrypt_batch_mpz,
+            public_key,
+            numbers,
+            factors
+        )
         
-        encrypted_sum = HomomorphicEncryption.add_encrypted_numbers(
+        encrypted_sum = await workers.run(
+            HomomorphicEncryption.add_mpz,
             public_key, 
             encrypted
         )
         
-        decrypted_sum = HomomorphicEncryption.decrypt_number(
+        decrypted_sum = await workers.run(
+            HomomorphicEncryption.decrypt_mpz,
             private_key, 
             encrypted_sum
         )
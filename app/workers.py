@@ -0,0 +1,59 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, TypeVar
+
+from app import blinding
+
+T = TypeVar('T')
+
+# Shared pool of worker processes for bignum work, started with the app.
+# Stays None outside the server, and is reset to None inside the workers
+# themselves, in which case nothing is split across processes.
+executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker():
+    """
+    Drop the server state a forked worker inherits: its copy of the
+    executor, the blinding pools and the refill task's event loop
+    """
+    global executor
+    executor = None
+    blinding.reset()
+
+
+def start() -> ProcessPoolExecutor:
+    """Start the shared worker pool"""
+    global executor
+    executor = ProcessPoolExecutor(initializer=_init_worker)
+    return executor
+
+
+def shutdown():
+    """Stop the shared worker pool, dropping any queued work"""
+    global executor
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+        executor = None
+
+
+async def run(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run self-contained bignum work in the worker pool so the event loop
+    stays free. Falls back to the default thread pool when the worker
+    pool is not running.
+    """
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def split(count: int, threshold: int) -> List[slice]:
+    """
+    Slices cutting count items into one chunk per CPU, so each chunk can
+    go to its own worker. Below the threshold, or without a worker pool,
+    everything stays in a single chunk.
+    """
+    if executor is None or count < threshold:
+        return [slice(0, count)]
+    chunk_size = -(-count // (os.cpu_count() or 1))
+    return [slice(start, start + chunk_size) for start in range(0, count, chunk_size)]
@@ -1,5 +1,7 @@
 from fastapi import FastAPI
-from app.routes import router
+from fastapi.responses import ORJSONResponse
+from app import blinding, keypool, workers
+from app.routes import add_request_schemas, router
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -7,12 +9,35 @@ app = FastAPI(
     description="Educational project demonstrating Paillier homomorphic encryption",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Include API routes
 app.include_router(router, prefix="/api/v1")
 
+def openapi():
+    """OpenAPI schema, including the models nested in json_body request bodies"""
+    if app.openapi_schema is None:
+        add_request_schemas(FastAPI.openapi(app))
+    return app.openapi_schema
+
+app.openapi = openapi
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Start precomputing keypairs and blinding factors off the request path"""
+    executor = workers.start()
+    app.state.blinding_task = blinding.start(executor)
+    keypool.start(executor)
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Stop the precompute tasks and their worker processes"""
+    keypool.stop()
+    app.state.blinding_task.cancel()
+    workers.shutdown()
+
 @app.get("/", tags=["Root"])
 async def root():
     """Welcome endpoint with usage instructions"""
@@ -0,0 +1,19 @@
+import pytest
+
+from app.encryption import HomomorphicEncryption
+
+
+@pytest.fixture(scope="session")
+def keypair():
+    """One 2048-bit keypair shared by the whole test run"""
+    return HomomorphicEncryption.generate_keypair()
+
+
+@pytest.fixture
+def public_key(keypair):
+    return keypair[0]
+
+
+@pytest.fixture
+def private_key(keypair):
+    return keypair[1]
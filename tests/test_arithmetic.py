@@ -0,0 +1,88 @@
+import random
+
+import gmpy2
+import pytest
+from gmpy2 import mpz
+
+from app import arithmetic
+from app.encryption import HomomorphicEncryption
+
+
+def naive_multi_exp(nsquare, bases, exponents):
+    result = mpz(1)
+    for base, exponent in zip(bases, exponents):
+        result = result * gmpy2.powmod(base, exponent, nsquare) % nsquare
+    return result
+
+
+@pytest.mark.parametrize("count, bits", [
+    (1, 64),
+    (2, 64),
+    (3, 17),
+    # Windows are 4 bits wide for 40 bases, so this spans many more than 16 windows
+    (40, 256),
+    (100, 2048),
+])
+def test_multi_exp_matches_naive(public_key, count, bits):
+    rng = random.Random(count * bits)
+    nsquare = mpz(public_key.nsquare)
+    bases = [mpz(rng.randrange(1, nsquare)) for _ in range(count)]
+    exponents = [rng.getrandbits(bits) for _ in range(count)]
+    
+    assert arithmetic.multi_exp(nsquare, bases, exponents) == naive_multi_exp(nsquare, bases, exponents)
+
+
+def test_multi_exp_zero_exponents(public_key):
+    rng = random.Random(0)
+    nsquare = mpz(public_key.nsquare)
+    bases = [mpz(rng.randrange(1, nsquare)) for _ in range(5)]
+    
+    assert arithmetic.multi_exp(nsquare, bases, [0] * 5) == 1
+    assert arithmetic.multi_exp(nsquare, bases[:1], [0]) == 1
+    
+    exponents = [0, 12345, 0, 1, 0]
+    assert arithmetic.multi_exp(nsquare, bases, exponents) == naive_multi_exp(nsquare, bases, exponents)
+
+
+def test_linear_combination_mixed_signs(public_key, private_key):
+    values = [7, -3, 0, 1000, -250]
+    scalars = [2, -5, 9, -1, 3]
+    ciphertexts = [
+        HomomorphicEncryption.encrypt_mpz(public_key, value)[0]
+        for value in values
+    ]
+    
+    result = arithmetic.linear_combination(public_key, ciphertexts, scalars)
+    expected = sum(value * scalar for value, scalar in zip(values, scalars))
+    
+    assert arithmetic.decrypt(private_key, result) == expected % public_key.n
+
+
+def test_linear_combination_mpz_mixed_signs(public_key, private_key):
+    values = [10, 2.5, -7, 1e6]
+    weights = [2, -1, 0.5, -1e-3]
+    encrypted = [HomomorphicEncryption.encrypt_mpz(public_key, value) for value in values]
+    
+    result = HomomorphicEncryption.linear_combination_mpz(public_key, encrypted, weights)
+    expected = sum(value * weight for value, weight in zip(values, weights))
+    
+    assert HomomorphicEncryption.decrypt_mpz(private_key, result) == pytest.approx(expected)
+
+
+def test_crt_decrypt_matches_phe_on_random_ciphertexts(private_key):
+    rng = random.Random(2)
+    nsquare = private_key.public_key.nsquare
+    for _ in range(20):
+        ciphertext = rng.randrange(1, nsquare)
+        assert arithmetic.decrypt(private_key, mpz(ciphertext)) == private_key.raw_decrypt(ciphertext)
+
+
+def test_crt_decrypt_negative_and_edge_encodings(public_key, private_key):
+    n = public_key.n
+    encodings = [0, 1, public_key.max_int, n - public_key.max_int, n - 5, n - 1]
+    for encoding in encodings:
+        factor = arithmetic.blinding_factor(n, public_key.nsquare)
+        ciphertext = arithmetic.encrypt(public_key, encoding, factor)
+        
+        assert arithmetic.decrypt(private_key, ciphertext) == encoding
+        assert private_key.raw_decrypt(int(ciphertext)) == encoding
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+
+from app import blinding
+
+
+class BrokenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+def test_refill_failure_is_logged(public_key, caplog):
+    async def scenario():
+        blinding.register(public_key, size=4)
+        task = blinding.start(BrokenExecutor())
+        await asyncio.wait([task], timeout=5)
+        assert task.done()
+    
+    try:
+        with caplog.at_level(logging.ERROR, logger="app.blinding"):
+            asyncio.run(scenario())
+    finally:
+        blinding.unregister(public_key)
+    
+    assert "Blinding factor refill stopped" in caplog.text
+    assert "BrokenProcessPool" in caplog.text
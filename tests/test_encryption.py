@@ -0,0 +1,33 @@
+import pytest
+from phe import paillier
+
+from app import blinding, encryption
+from app.encryption import HomomorphicEncryption
+
+NUMBERS = [0, 1, -1, 10, 20.5, -3.25, 1e-6, 123456789]
+
+
+def test_encrypt_batch_uses_precomputed_factors(public_key, private_key):
+    pool = blinding.register(public_key, size=4)
+    pool.extend(blinding._compute_factors(public_key.n, public_key.nsquare, 4))
+    try:
+        encrypted = HomomorphicEncryption.encrypt_batch_mpz(public_key, NUMBERS)
+        assert pool.missing() == 4
+    finally:
+        blinding.unregister(public_key)
+    
+    decrypted = [HomomorphicEncryption.decrypt_mpz(private_key, value) for value in encrypted]
+    assert decrypted == pytest.approx(NUMBERS)
+
+
+def test_ipcl_encrypt_matches_phe_encoding(public_key, private_key):
+    pytest.importorskip("ipcl_python")
+    
+    encrypted = encryption._ipcl_encrypt(public_key, NUMBERS)
+    
+    # IPCL is handed float64s, so compare against phe's encoding of the float
+    for number, (ciphertext, exponent) in zip(NUMBERS, encrypted):
+        expected = paillier.EncodedNumber.encode(public_key, float(number))
+        assert exponent == expected.exponent
+        assert private_key.raw_decrypt(int(ciphertext)) == expected.encoding
+        assert HomomorphicEncryption.decrypt_mpz(private_key, (ciphertext, exponent)) == pytest.approx(number)
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app import blinding, keypool
+from app.encryption import HomomorphicEncryption
+
+
+class BrokenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+@pytest.fixture(autouse=True)
+def generated_keys(monkeypatch, keypair):
+    """Isolate the module state, and make key generation instant and countable"""
+    monkeypatch.setattr(keypool, "_ready", None)
+    monkeypatch.setattr(keypool, "_slots", None)
+    monkeypatch.setattr(keypool, "_fillers", [])
+    generated = []
+    lock = threading.Lock()
+    
+    def generate_keypair():
+        with lock:
+            generated.append(keypair)
+        return keypair
+    
+    monkeypatch.setattr(HomomorphicEncryption, "generate_keypair", generate_keypair)
+    yield generated
+    blinding.unregister(keypair[0])
+
+
+async def stop_pool():
+    keypool.stop()
+    await asyncio.gather(*keypool._fillers, return_exceptions=True)
+
+
+async def wait_for(condition, timeout=5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_get_keypair_without_pool(generated_keys, keypair):
+    assert asyncio.run(keypool.get_keypair()) == keypair
+    assert len(generated_keys) == 1
+
+
+def test_get_keypair_falls_back_once_fillers_die(generated_keys, keypair, caplog):
+    async def scenario():
+        keypool.start(BrokenExecutor())
+        keypair_taken = await asyncio.wait_for(keypool.get_keypair(), 5)
+        assert all(filler.done() for filler in keypool._fillers)
+        return keypair_taken
+    
+    with caplog.at_level(logging.ERROR, logger="app.keypool"):
+        assert asyncio.run(scenario()) == keypair
+    
+    assert len(generated_keys) == 1
+    assert "Keypair pool filler stopped" in caplog.text
+    assert "BrokenProcessPool" in caplog.text
+
+
+def test_slots_cap_keys_in_flight(generated_keys, keypair, monkeypatch):
+    monkeypatch.setattr(keypool, "POOL_SIZE", 2)
+    monkeypatch.setattr(keypool, "FILL_CONCURRENCY", 4)
+    
+    async def scenario():
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            keypool.start(executor)
+            try:
+                await wait_for(lambda: keypool._ready.qsize() == 2)
+                await asyncio.sleep(0.1)
+                # Four fillers, but only as many keys as the pool has room for
+                assert len(generated_keys) == 2
+                
+                assert await keypool.get_keypair() == keypair
+                await wait_for(lambda: keypool._ready.qsize() == 2)
+                await asyncio.sleep(0.1)
+                assert len(generated_keys) == 3
+            finally:
+                await stop_pool()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,135 @@
+import base64
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import arithmetic, workers
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def server():
+    """Client for an app with its worker pool and keypool running"""
+    with TestClient(app) as running:
+        yield running
+
+
+def encrypt(server, numbers):
+    response = server.post("/api/v1/encrypt", json={"numbers": numbers})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def decrypt(server, private_key, encrypted_value):
+    response = server.post("/api/v1/decrypt", json={
+        "encrypted_value": encrypted_value,
+        "private_key": private_key
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["decrypted_value"]
+
+
+def multiply_batch(server, encrypted, multipliers):
+    return server.post("/api/v1/compute/multiply-batch", json={
+        "encrypted_numbers": encrypted["encrypted_numbers"],
+        "public_key": encrypted["public_key"],
+        "multipliers": multipliers
+    })
+
+
+@pytest.mark.parametrize("body", [b'\xff\xfe', b'{"private_key": "secret", '])
+def test_invalid_json_body_is_422_without_echoing_it(body):
+    response = client.post("/api/v1/decrypt", content=body, headers={"content-type": "application/json"})
+    
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "json_invalid"
+    assert error["loc"] == ["body"]
+    assert error["input"] == {}
+    assert "secret" not in response.text
+
+
+def test_openapi_refs_resolve():
+    schema = client.get("/openapi.json").json()
+    components = schema["components"]["schemas"]
+    
+    refs = re.findall(r'"#/components/schemas/([^"]+)"', json.dumps(schema))
+    assert refs
+    assert set(refs) <= set(components)
+
+
+@pytest.mark.parametrize("multipliers, expected", [
+    ([2, -1, 0.5, -0.25, 3], [20, -2.5, -3.5, 0, 3e6]),
+    # A single multiplier applies to every number
+    ([-1.5], [-15, -3.75, 10.5, 0, -1.5e6]),
+])
+def test_multiply_batch(server, multipliers, expected):
+    encrypted = encrypt(server, [10, 2.5, -7, 0, 1e6])
+    
+    response = multiply_batch(server, encrypted, multipliers)
+    
+    assert response.status_code == 200, response.text
+    results = response.json()["encrypted_results"]
+    assert [decrypt(server, encrypted["private_key"], result) for result in results] == pytest.approx(expected)
+
+
+def test_multiply_batch_length_mismatch(server):
+    encrypted = encrypt(server, [1, 2, 3])
+    
+    response = multiply_batch(server, encrypted, [2, 3])
+    
+    assert response.status_code == 400
+
+
+def test_multiply_batch_keeps_order_across_chunks(server, monkeypatch):
+    monkeypatch.setattr(workers.os, "cpu_count", lambda: 4)
+    count = arithmetic.PARALLEL_MULTIPLY_THRESHOLD + 6
+    assert len(workers.split(count, arithmetic.PARALLEL_MULTIPLY_THRESHOLD)) == 4
+    numbers = [i - count // 2 for i in range(count)]
+    multipliers = [0.5 * i - 3 for i in range(count)]
+    encrypted = encrypt(server, numbers)
+    
+    response = multiply_batch(server, encrypted, multipliers)
+    
+    assert response.status_code == 200, response.text
+    results = response.json()["encrypted_results"]
+    assert [decrypt(server, encrypted["private_key"], result) for result in results] == pytest.approx(
+        [number * multiplier for number, multiplier in zip(numbers, multipliers)]
+    )
+
+
+def test_encrypt_compute_decrypt_round_trip(server):
+    numbers = [10, 2.5, -7, 1e6]
+    encrypted = encrypt(server, numbers)
+    
+    # Ciphertexts are objects, and key values are base64 big-endian strings
+    for value in encrypted["encrypted_numbers"]:
+        assert set(value) == {"ciphertext", "exponent"}
+        assert isinstance(value["exponent"], int)
+        base64.b64decode(value["ciphertext"], validate=True)
+    public_key = json.loads(encrypted["public_key"])
+    private_key = json.loads(encrypted["private_key"])
+    n = int.from_bytes(base64.b64decode(public_key["n"], validate=True), "big")
+    p, q = (int.from_bytes(base64.b64decode(private_key[name], validate=True), "big") for name in "pq")
+    assert n == p * q
+    
+    added = server.post("/api/v1/compute", json={
+        "encrypted_numbers": encrypted["encrypted_numbers"],
+        "public_key": encrypted["public_key"],
+        "operation": "add"
+    })
+    assert added.status_code == 200, added.text
+    assert decrypt(server, encrypted["private_key"], added.json()["encrypted_result"]) == pytest.approx(sum(numbers))
+    
+    multiplied = server.post("/api/v1/compute", json={
+        "encrypted_numbers": encrypted["encrypted_numbers"][1:],
+        "public_key": encrypted["public_key"],
+        "operation": "multiply",
+        "multiplier": -3
+    })
+    assert multiplied.status_code == 200, multiplied.text
+    assert decrypt(server, encrypted["private_key"], multiplied.json()["encrypted_result"]) == pytest.approx(-7.5)
@@ -0,0 +1,21 @@
+import asyncio
+
+from app import blinding, workers
+
+
+def worker_state():
+    return workers.executor, len(blinding._pools), blinding._refill_loop, blinding._refill_needed
+
+
+def test_forked_workers_drop_server_state(public_key):
+    # Everything a running server holds when the workers fork
+    loop = asyncio.new_event_loop()
+    blinding.register(public_key)
+    blinding._refill_loop, blinding._refill_needed = loop, asyncio.Event()
+    executor = workers.start()
+    try:
+        assert executor.submit(worker_state).result() == (None, 0, None, None)
+    finally:
+        workers.shutdown()
+        blinding.reset()
+        loop.close()